@@ -1,6 +1,6 @@
 import sys
 import traceback
-from flask import Flask
+from flask import Flask, g
 
 from handlers.v1.auth import bp as bp_auth_v1
 from handlers.v1.main import bp as bp_main_v1
@@ -8,6 +8,7 @@ from handlers.v1.game import bp as bp_game_v1
 from handlers.v1.chat import bp as bp_chat_v1
 from handlers.v2.urls import bp_main, bp_auth, bp_chat, bp_game
 from errors import BaseException
+from models import BaseModel
 from loggers import logger
 
 
@@ -27,6 +28,23 @@ app.register_blueprint(bp_chat)
 app.register_blueprint(bp_game)
 
 
+@app.before_request
+def db_connect():
+    # models may be bound to another database than config.DB, e.g. in tests
+    db = BaseModel._meta.database
+    g.db_opened = db.is_closed()
+    if g.db_opened:
+        db.connect()
+
+
+@app.teardown_request
+def db_close(exc):
+    # close only connection opened for this request, it returns to the pool
+    db = BaseModel._meta.database
+    if g.get('db_opened') and not db.is_closed():
+        db.close()
+
+
 @app.errorhandler(Exception)
 def all_exception_handler(error):
     if isinstance(error, BaseException):
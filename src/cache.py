@@ -11,12 +11,17 @@ from helpers import get_queue_name, get_prefix
 redis = StrictRedis(config.CACHE_HOST, config.CACHE_PORT, config.CACHE_DB)
 
 
-def set_cache(key, data, time=None):
+def pipeline():
+    return redis.pipeline()
+
+
+def set_cache(key, data, time=None, pipe=None):
+    client = redis if pipe is None else pipe
     _data = pickle.dumps(data)
     if time:
-        redis.setex(key, time, _data)
+        client.setex(key, time, _data)
     else:
-        redis.set(key, _data)
+        client.set(key, _data)
 
 
 def get_cache(key):
@@ -31,6 +36,22 @@ def delete_cache(key):
     redis.delete(key)
 
 
+def set_counter(key, value=0, time=None, only_new=False):
+    return bool(redis.set(key, value, ex=time, nx=only_new))
+
+
+# increments only existing counter, returns nil otherwise
+INCR_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incr', KEYS[1])
+end
+"""
+
+
+def incr(key):
+    return redis.eval(INCR_SCRIPT, 1, key)
+
+
 def add_to_queue(token, prefix=''):
     redis.rpush(get_queue_name(prefix), token.encode())
 
@@ -1,6 +1,11 @@
+import os
+
 # db config
-from playhouse.sqlite_ext import SqliteExtDatabase
-DB = SqliteExtDatabase('/tmp/dark_chess.db')
+from playhouse.pool import PooledSqliteExtDatabase
+DB = PooledSqliteExtDatabase('/tmp/dark_chess.db', max_connections=8, stale_timeout=300, pragmas=(
+    ('journal_mode', 'wal'),
+    ('synchronous', 'normal'),
+))
 
 # development mode
 DEBUG = False
@@ -35,12 +40,17 @@ SMTP_BROKER_DB = 1
 VERIFICATION_PERIOD = 10 * 60
 VERIFICATION_TIME = 2 * 60 * 60
 SESSION_TIME = 24 * 60 * 60
+AUTH_CACHE_TIME = 60
+USER_CACHE_TIME = 5 * 60
 CACHE_MAX_TIME = 24 * 60 * 60
 RESET_PERIOD = 5 * 60
 RESET_TIME = 30 * 60
 
 # password and tokens config
+PASSWORD_ROUNDS = 10
 PASSWORD_SALT = ''
+# key of cached password checks, set the same value on all servers in config_local
+AUTH_CACHE_SECRET = os.urandom(32)
 TOKEN_SHORT_LENGTH = 10
 
 # game config
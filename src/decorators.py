@@ -21,14 +21,10 @@ def authenticated(f):
         request.auth = None
         if token is not None:
             user_id = get_cache(token)
-            if user_id:
-                try:
-                    user = User.get(pk=user_id)
-                except User.DoesNotExist:
-                    pass
-                else:
-                    request.user = user
-                    request.auth = token
+            user = User.get_cached(user_id) if user_id else None
+            if user:
+                request.user = user
+                request.auth = token
         return f(*args, **kwargs)
     return decorator
 
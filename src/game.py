@@ -117,16 +117,14 @@ class Game(object):
             figure, move = self.game.move(color, coors2pos(coor1), coors2pos(coor2))
         except errors.EndGame as e:
             game_over, figure, move = e.reason, e.figure, e.move
+        cut = self.game.board._cut.symbol if self.game.board._cut else None
         try:
             num = self.model.add_move(
-                figure.symbol, move, str(self.game.board), game_over
+                figure.symbol, move, str(self.game.board), game_over, cut
             ).number
         except Exception as e:
             logger.error(e)
             raise errors.BaseException
-        if self.game.board._cut:
-            self.model.cut += self.game.board._cut.symbol
-            self.model.save()
         self.onMove()
         msg = self.get_info(invert_color(color))
         msg.update({'number': num})
@@ -40,6 +40,9 @@ class RestBase():
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
         return response
 
+    def on_rollback(self):
+        pass
+
     def check_authorization(self):
         token = (request.json or {}).get('auth') or \
             request.values.get('auth') or \
@@ -48,14 +51,10 @@ class RestBase():
         request.auth = None
         if token is not None:
             user_id = get_cache(token)
-            if user_id:
-                try:
-                    user = User.get(pk=user_id)
-                except User.DoesNotExist:
-                    pass
-                else:
-                    request.user = user
-                    request.auth = token
+            user = User.get_cached(user_id) if user_id else None
+            if user:
+                request.user = user
+                request.auth = token
 
     def __call__(self, *args, **kwargs):
         method = request.method
@@ -82,6 +81,7 @@ class RestBase():
                         result = func(*args, **kwargs)
                     except Exception as e:
                         transaction.rollback()
+                        self.on_rollback()
                         raise e
         except APIUnauthorized as e:
             abort(make_response(e.message, 401))
@@ -42,6 +42,10 @@ class RestGameBase(RestBase):
                 raise errors.APIException('wrong user')
         self.game = game
 
+    def on_rollback(self):
+        # move counter may be ahead of rolled back moves
+        self.game.model.reset_moves_counter()
+
 
 class RestTypes(RestBase):
     def get(self):
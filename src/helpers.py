@@ -1,6 +1,10 @@
-import uuid
+import hmac
+import os
+from base64 import urlsafe_b64encode
 from hashlib import md5
 
+import bcrypt
+
 from consts import WHITE, BLACK
 import config
 
@@ -33,12 +37,26 @@ def invert_color(color):
 
 
 def encrypt_password(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(config.PASSWORD_ROUNDS)).decode()
+
+
+def encrypt_password_legacy(password):
     pass_md5 = md5(password.encode()).hexdigest()
     return md5((pass_md5 + config.PASSWORD_SALT).encode()).hexdigest()
 
 
+def is_legacy_password(hashed):
+    return not hashed.startswith('$2')
+
+
+def check_password(password, hashed):
+    if is_legacy_password(hashed):
+        return hmac.compare_digest(encrypt_password_legacy(password), hashed)
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
 def generate_token(short=False):
-    token = uuid.uuid4().hex
+    token = urlsafe_b64encode(os.urandom(24)).decode()
     if short:
         return token[:config.TOKEN_SHORT_LENGTH]
     return token
@@ -1,28 +1,56 @@
+import hmac
 from datetime import datetime, timedelta
+from hashlib import sha256
 
 import peewee
 
 import config
 import consts
 import errors
-from helpers import encrypt_password, generate_token, invert_color
-from cache import set_cache, get_cache, delete_cache
+from helpers import (
+    encrypt_password, check_password, is_legacy_password, generate_token, invert_color
+)
+from cache import set_cache, get_cache, delete_cache, set_counter, incr, pipeline
+
+
+class TimestampField(peewee.BigIntegerField):
+    # datetime is stored as integer count of microseconds since epoch
+
+    def db_value(self, value):
+        if isinstance(value, datetime):
+            return int(value.timestamp()) * 1000000 + value.microsecond
+        return value
+
+    def python_value(self, value):
+        if isinstance(value, int):
+            return datetime.fromtimestamp(value // 1000000).replace(microsecond=value % 1000000)
+        return value
 
 
 class BaseModel(peewee.Model):
     class Meta:
         database = config.DB
 
+    @classmethod
+    def execute_sql(cls, sql, params=None, many=False):
+        db = cls._meta.database
+        if many:
+            cursor = db.get_cursor()
+            with db.exception_wrapper():
+                cursor.executemany(sql, params)
+            return cursor
+        return db.execute_sql(sql, params)
+
 
 class User(BaseModel):
     pk = peewee.PrimaryKeyField()
     username = peewee.CharField(unique=True)
     password = peewee.CharField()
     email = peewee.CharField(unique=True, null=True)
-    date_created = peewee.DateTimeField(default=datetime.now)
-    date_verified = peewee.DateTimeField(null=True)
-    date_verification_token = peewee.DateTimeField(null=True)
-    date_last_reset = peewee.DateTimeField(null=True)
+    date_created = TimestampField(default=datetime.now)
+    date_verified = TimestampField(null=True)
+    date_verification_token = TimestampField(null=True)
+    date_last_reset = TimestampField(null=True)
 
     @classmethod
     def add(cls, username, password, email=None):
@@ -30,12 +58,21 @@ class User(BaseModel):
 
     @classmethod
     def authenticate(cls, username, password):
-        try:
-            user = cls.get(username=username, password=encrypt_password(password))
-        except cls.DoesNotExist:
+        user = cls.select(cls.pk, cls.password).where(cls.username == username).limit(1).first()
+        if user is None:
             return False
+        pipe = pipeline()
+        auth_name = user._get_auth_name(password)
+        if get_cache(auth_name) != user.pk:
+            if not check_password(password, user.password):
+                return False
+            if is_legacy_password(user.password):
+                user.set_password(password)
+                auth_name = user._get_auth_name(password)
+            set_cache(auth_name, user.pk, config.AUTH_CACHE_TIME, pipe)
         token = generate_token()
-        set_cache(token, user.pk, config.SESSION_TIME)
+        set_cache(token, user.pk, config.SESSION_TIME, pipe)
+        pipe.execute()
         return token
 
     @classmethod
@@ -43,14 +80,41 @@ class User(BaseModel):
         user_id = get_cache(token)
         if not user_id:
             return
+        return cls.get_cached(user_id)
+
+    @classmethod
+    def _get_cache_name(cls, pk):
+        return 'user-{}'.format(pk)
+
+    @classmethod
+    def get_cached(cls, pk):
+        name = cls._get_cache_name(pk)
+        data = get_cache(name)
+        if data:
+            return cls(**data)
         try:
-            return cls.get(pk=user_id)
+            user = cls.get(pk=pk)
         except cls.DoesNotExist:
             return
+        # password hash is kept out of cache, save of cached user doesn't write it
+        data = {k: v for k, v in user._data.items() if k != 'password'}
+        set_cache(name, data, config.USER_CACHE_TIME)
+        return user
+
+    def save(self, *args, **kwargs):
+        result = super(User, self).save(*args, **kwargs)
+        delete_cache(self._get_cache_name(self.pk))
+        return result
+
+    def _get_auth_name(self, password):
+        # keyed by server secret, stored hash is in message to drop cache on password change
+        msg = '{}:{}'.format(self.password, password).encode()
+        digest = hmac.new(config.AUTH_CACHE_SECRET, msg, sha256).hexdigest()
+        return 'auth-{}-{}'.format(self.pk, digest)
 
     def set_password(self, password):
-        self.password=encrypt_password(password)
-        self.save()
+        self.password = encrypt_password(password)
+        self.save(only=[User.password])
 
     def get_verification(self):
         if self.verified:
@@ -95,10 +159,10 @@ class Game(BaseModel):
     black = peewee.CharField()
     player_white = peewee.ForeignKeyField(User, related_name='games_white', null=True)
     player_black = peewee.ForeignKeyField(User, related_name='games_black', null=True)
-    date_created = peewee.DateTimeField(default=datetime.now)
-    date_end = peewee.DateTimeField(null=True)
+    date_created = TimestampField(default=datetime.now)
+    date_end = TimestampField(null=True)
     state = peewee.CharField(null=True)
-    date_state = peewee.DateTimeField(default=datetime.now)
+    date_state = TimestampField(default=datetime.now)
     next_color = peewee.IntegerField(default=consts.WHITE)
     type_game = peewee.IntegerField(default=consts.TYPE_NOLIMIT)
     time_limit = peewee.IntegerField(null=True)
@@ -106,6 +170,12 @@ class Game(BaseModel):
     winner = peewee.IntegerField(null=True)
     cut = peewee.CharField(default='')
 
+    @classmethod
+    def create(cls, **query):
+        game = super(Game, cls).create(**query)
+        set_counter(game._get_moves_name(), 0, config.CACHE_MAX_TIME)
+        return game
+
     @classmethod
     def get_game(cls, token):
         game = cls.get((cls.white == token) | (cls.black == token))
@@ -115,21 +185,41 @@ class Game(BaseModel):
             game._loaded_by = consts.BLACK
         return game
 
-    def add_move(self, figure, move, state, end_reason=None):
-        with config.DB.atomic():
-            color = self.next_color
-            num = self.moves.select().count() + 1
-            time_move = (datetime.now() - self.date_state).total_seconds()
-            self.state = state
-            self.next_color = invert_color(color)
-            self.date_state = datetime.now()
-            if end_reason:
-                self.game_over(end_reason, save=False, winner=color)
-            self.save()
-            return Move.create(
-                game=self, number=num, figure=figure, move=move,
-                time_move=time_move, color=color
-            )
+    def _get_moves_name(self):
+        return 'game-{}-moves'.format(self.pk)
+
+    def get_next_move_num(self):
+        name = self._get_moves_name()
+        while True:
+            num = incr(name)
+            if num is not None:
+                return num
+            num = (self.moves.select(peewee.fn.MAX(Move.number)).scalar() or 0) + 1
+            if set_counter(name, num, config.CACHE_MAX_TIME, only_new=True):
+                return num
+
+    def reset_moves_counter(self):
+        # counter is restored from moves on next call, call it when a move is rolled back
+        delete_cache(self._get_moves_name())
+
+    def add_move(self, figure, move, state, end_reason=None, cut=None):
+        try:
+            with self._meta.database.atomic():
+                color = self.next_color
+                num = self.get_next_move_num()
+                time_move = (datetime.now() - self.date_state).total_seconds()
+                self.state = state
+                self.next_color = invert_color(color)
+                self.date_state = datetime.now()
+                if cut:
+                    self.cut += cut
+                if end_reason:
+                    self.game_over(end_reason, save=False, winner=color)
+                self.save()
+                return Move.add(self, num, figure, move, time_move, color)
+        except:
+            self.reset_moves_counter()
+            raise
 
     def game_over(self, reason, date_end=None, save=True, winner=None):
         self.date_end = date_end or datetime.now()
@@ -198,10 +288,59 @@ class Move(BaseModel):
     number = peewee.IntegerField()
     figure = peewee.FixedCharField(max_length=1)
     move = peewee.CharField(max_length=5)
-    date_created = peewee.DateTimeField(default=datetime.now)
+    date_created = TimestampField(default=datetime.now)
     time_move = peewee.FloatField()
     color = peewee.IntegerField()
 
+    class Meta:
+        indexes = (
+            (('game', 'number'), True),
+        )
+
+    # compiled insert query and its fields in order of parameters for each database,
+    # values are bound on execution
+    _insert_sql = {}
+
+    @classmethod
+    def get_insert_sql(cls):
+        db = cls._meta.database
+        if db not in cls._insert_sql:
+            fields = [f for f in cls._meta.sorted_fields if f is not cls._meta.primary_key]
+            sql = cls.insert(**{f.name: 0 for f in fields}).sql()[0]
+            cls._insert_sql[db] = (sql, fields)
+        return cls._insert_sql[db]
+
+    @classmethod
+    def add(cls, game, number, figure, move, time_move, color):
+        db = cls._meta.database
+        sql, fields = cls.get_insert_sql()
+        data = dict(
+            game=game, number=number, figure=figure, move=move,
+            date_created=datetime.now(), time_move=time_move, color=color
+        )
+        cursor = cls.execute_sql(sql, [f.db_value(data[f.name]) for f in fields])
+        if db.insert_returning:
+            pk = cursor.fetchone()[0]
+        else:
+            pk = db.last_insert_id(cursor, cls)
+        return cls(pk=pk, **data)
+
+    @classmethod
+    def bulk_add(cls, rows):
+        # rows are tuples of (game, number, figure, move, time_move, color)
+        sql, fields = cls.get_insert_sql()
+        names = ('game', 'number', 'figure', 'move', 'time_move', 'color')
+        now = datetime.now()
+        params = []
+        for row in rows:
+            data = dict(zip(names, row), date_created=now)
+            params.append([f.db_value(data[f.name]) for f in fields])
+        with cls._meta.database.atomic():
+            cls.execute_sql(sql, params, many=True)
+        # counters are restored from inserted moves
+        for pk in {getattr(row[0], 'pk', row[0]) for row in rows}:
+            Game(pk=pk).reset_moves_counter()
+
 
 class Chat(BaseModel):
     pk = peewee.PrimaryKeyField()
@@ -212,7 +351,7 @@ class ChatMessage(BaseModel):
     pk = peewee.PrimaryKeyField()
     chat = peewee.ForeignKeyField(Chat, related_name='messages', null=True, on_delete='CASCADE')
     user = peewee.ForeignKeyField(User, related_name='messages', null=True)
-    date_created = peewee.DateTimeField(default=datetime.now)
+    date_created = TimestampField(default=datetime.now)
     text = peewee.CharField()
 
 
@@ -222,22 +361,69 @@ class GamePool(BaseModel):
     player2 = peewee.CharField(null=True)
     user1 = peewee.ForeignKeyField(User, related_name='gamepools1', null=True)
     user2 = peewee.ForeignKeyField(User, related_name='gamepools2', null=True)
-    date_created = peewee.DateTimeField(default=datetime.now)
+    date_created = TimestampField(default=datetime.now)
     type_game = peewee.IntegerField(default=consts.TYPE_NOLIMIT)
     time_limit = peewee.IntegerField(null=True)
     is_started = peewee.BooleanField(default=False)
     is_lost = peewee.BooleanField(default=False)
 
 
+def migrate_timestamps(models):
+    # converts dates stored as text before TimestampField, sqlite keeps them in
+    # the same column and would sort them apart from integers
+    # other databases get the columns altered to bigint, which converts the dates
+    count = 0
+    for model in models:
+        if not isinstance(model._meta.database, peewee.SqliteDatabase):
+            continue
+        for field in model._meta.sorted_fields:
+            if not isinstance(field, TimestampField):
+                continue
+            rows = model.select(model._meta.primary_key, field)\
+                .where(peewee.fn.typeof(field) == 'text')\
+                .tuples()
+            for pk, value in rows:
+                value = peewee.format_date_time(value, peewee.DateTimeField.formats)
+                model.update(**{field.name: value})\
+                    .where(model._meta.primary_key == pk)\
+                    .execute()
+                count += 1
+    return count
+
+
+def create_move_index():
+    # create_tables skips existing tables, so older databases lack the unique index of moves,
+    # returns games with duplicate move numbers when the index can't be created
+    db = Move._meta.database
+    fields = [Move.game, Move.number]
+    name = db.compiler().index_name(Move._meta.db_table, [f.db_column for f in fields])
+    if name in [index.name for index in db.get_indexes(Move._meta.db_table)]:
+        return []
+    games = Move.select(Move.game)\
+        .group_by(Move.game, Move.number)\
+        .having(peewee.fn.COUNT(Move.pk) > 1)\
+        .tuples()
+    games = sorted({game for game, in games})
+    if not games:
+        db.create_index(Move, fields, True)
+    return games
+
+
 if __name__ == '__main__':
     config.DB.connect()
     TABLES = [User, Game, Move, Chat, ChatMessage, GamePool]
-    added = []
-    for table in TABLES:
-        if not table.table_exists():
-            config.DB.create_tables([table])
-            added.append(table.__name__)
+    added = [table.__name__ for table in TABLES if not table.table_exists()]
+    with config.DB.atomic():
+        config.DB.create_tables(TABLES, safe=True)
+        migrated = migrate_timestamps(TABLES)
+        duplicates = create_move_index()
     if added:
         print('Tables created: {}'.format(', '.join(added)))
     else:
         print('All tables already exist')
+    if migrated:
+        print('Dates converted to timestamps: {}'.format(migrated))
+    if duplicates:
+        print('Unique index of moves is not created, games with duplicate move numbers: {}'.format(
+            ', '.join(map(str, duplicates))
+        ))
@@ -2,7 +2,7 @@ import inspect
 import json
 import sys
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, DEFAULT
 from urllib.parse import urljoin
 
 from fakeredis import FakeStrictRedis
@@ -65,11 +65,33 @@ class TestCaseDB(TestCaseCache):
 
 class TestCaseWeb(TestCaseDB):
     url_prefix = '/v1/'
+    # {attribute name: patch target}, patched once per class and reset before each test,
+    # extend with dict(TestCaseWeb.patches, name=target)
+    patches = {'get_verification': 'models.User.get_verification'}
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestCaseWeb, cls).setUpClass()
+        cls._patchers = [patch(target, autospec=True) for target in cls.patches.values()]
+        for name, patcher in zip(cls.patches.keys(), cls._patchers):
+            # autospec mock is a function, keep it unbound
+            setattr(cls, name, staticmethod(patcher.start()))
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in cls._patchers:
+            patcher.stop()
+        super(TestCaseWeb, cls).tearDownClass()
 
     def setUp(self):
         app.config['TESTING'] = True
         app.config['DEBUG'] = True
         self.client = app.test_client()
+        for name in self.patches.keys():
+            mock = getattr(self, name)
+            mock.reset_mock()
+            mock.return_value = DEFAULT
+            mock.side_effect = None
         super(TestCaseWeb, self).setUp()
 
     def assertApiError(self, response, code=400):
@@ -82,19 +104,24 @@ class TestCaseWeb(TestCaseDB):
             return '{}?{}'.format(main_url, args)
         return main_url
 
+    def url2(self, *parts):
+        return self.url_prefix + '/'.join(map(str, parts))
+
     def load_data(self, response):
         self.assertEqual(response.status_code, 200)
         return json.loads(response.data.decode())
 
     def add_user(self, username, password, email, token='token'):
-        with patch('models.User.get_verification') as mock:
-            mock.return_value = token
-            self.client.post('/v1/auth/register', data={
-                'username': username,
-                'password': password,
-                'email': email,
-            })
-            return username, password
+        self.get_verification.return_value = token
+        self.client.post('/v1/auth/register', data={
+            'username': username,
+            'password': password,
+            'email': email,
+        })
+        # calls made while adding the user are not counted by tests
+        for name in self.patches.keys():
+            getattr(self, name).reset_mock()
+        return username, password
 
     def login(self, username, password):
         user_data = {
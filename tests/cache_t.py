@@ -1,10 +1,12 @@
-import time
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
 
 from tests.base import TestCaseCache
 import consts
 from cache import (
-    set_cache, get_cache, delete_cache, add_to_queue, get_from_queue,
-    get_from_any_queue, get_cache_func_name
+    set_cache, get_cache, delete_cache, set_counter, incr, pipeline, add_to_queue,
+    get_from_queue, get_from_any_queue, get_cache_func_name
 )
 from helpers import get_prefix
 
@@ -19,10 +21,11 @@ class TestCache(TestCaseCache):
         self.assertEqual(get_cache('key'), None)
 
     def test_cache_2(self):
-        set_cache('key', 'data', 1)
-        self.assertEqual(get_cache('key'), 'data')
-        time.sleep(1)
-        self.assertEqual(get_cache('key'), None)
+        with freeze_time(datetime.now()) as freezer:
+            set_cache('key', 'data', 1)
+            self.assertEqual(get_cache('key'), 'data')
+            freezer.tick(timedelta(seconds=2))
+            self.assertEqual(get_cache('key'), None)
 
     def test_cache_3(self):
         set_cache('key', (1, True, 'test'))
@@ -30,6 +33,30 @@ class TestCache(TestCaseCache):
         set_cache('key', {'k1': 'v1', 'k2': True})
         self.assertEqual(get_cache('key'), {'k1': 'v1', 'k2': True})
 
+    def test_cache_pipeline(self):
+        pipe = pipeline()
+        set_cache('key1', 'data1', pipe=pipe)
+        set_cache('key2', (1, 'data2'), 10, pipe)
+        self.assertIsNone(get_cache('key1'))
+        self.assertIsNone(get_cache('key2'))
+        pipe.execute()
+        self.assertEqual(get_cache('key1'), 'data1')
+        self.assertEqual(get_cache('key2'), (1, 'data2'))
+
+    def test_counter(self):
+        self.assertIsNone(incr('counter'))
+        self.assertIsNone(incr('counter'))
+        self.assertTrue(set_counter('counter'))
+        self.assertEqual(incr('counter'), 1)
+        # existing counter is not overwritten
+        self.assertFalse(set_counter('counter', 5, only_new=True))
+        self.assertEqual(incr('counter'), 2)
+        with freeze_time(datetime.now()) as freezer:
+            set_counter('counter', 10, 1)
+            self.assertEqual(incr('counter'), 11)
+            freezer.tick(timedelta(seconds=2))
+            self.assertIsNone(incr('counter'))
+
     def test_queue_1(self):
         self.assertIsNone(get_from_queue('p1'))
         self.assertIsNone(get_from_queue('p2'))
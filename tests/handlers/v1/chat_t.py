@@ -1,4 +1,3 @@
-from unittest.mock import patch
 
 from tests.base import TestCaseWeb
 from models import User, ChatMessage
@@ -7,24 +6,24 @@ import consts
 
 class TestHandlerChat(TestCaseWeb):
     url_prefix = '/v1/chat/'
+    patches = dict(TestCaseWeb.patches, send_ws='handlers.v1.chat.send_ws')
 
     def test_messages_1(self):
         # get messages, should be empty
         resp = self.client.get(self.url('messages'))
         self.assertEqual(self.load_data(resp), {'rc': True, 'messages': []})
         # add message 1
-        with patch('handlers.v1.chat.send_ws') as mock:
-            resp = self.client.post(self.url('messages'), data={'text': 'message1'})
-            data = self.load_data(resp)
-            mock.assert_called_once_with(data, consts.WS_CHAT_MESSAGE)
+        resp = self.client.post(self.url('messages'), data={'text': 'message1'})
+        data = self.load_data(resp)
+        self.send_ws.assert_called_once_with(data, consts.WS_CHAT_MESSAGE)
         self.assertEqual(data['message']['user'], 'anonymous')
         self.assertEqual(data['message']['text'], 'message1')
         dt1 = data['message']['created_at']
         # add message 2
-        with patch('handlers.v1.chat.send_ws') as mock:
-            resp = self.client.post(self.url('messages'), data={'text': 'message2'})
-            data = self.load_data(resp)
-            mock.assert_called_once_with(data, consts.WS_CHAT_MESSAGE)
+        self.send_ws.reset_mock()
+        resp = self.client.post(self.url('messages'), data={'text': 'message2'})
+        data = self.load_data(resp)
+        self.send_ws.assert_called_once_with(data, consts.WS_CHAT_MESSAGE)
         self.assertEqual(data['message']['user'], 'anonymous')
         self.assertEqual(data['message']['text'], 'message2')
         dt2 = data['message']['created_at']
@@ -18,7 +18,7 @@ class TestHandlerGame(TestCaseWeb):
         resp = self.client.get(self.url('new'))
         data = self.load_data(resp)
         game_id = data['games'][0]['id']
-        resp = self.client.post(self.url('new/{}'.format(game_id)))
+        resp = self.client.post(self.url2('new', game_id))
         token2 = self.load_data(resp)['game']
         return token1, token2
 
@@ -96,7 +96,7 @@ class TestHandlerGame(TestCaseWeb):
         self.assertCompareDicts(data, expect)
         token = data['invite']
         # start game with invitation token
-        resp = self.client.get(self.url('invite/{}'.format(token)))
+        resp = self.client.get(self.url2('invite', token))
         data = self.load_data(resp)
         expect = {
             'rc': True, 'board': {}, 'time_left': {}, 'enemy_time_left': {},
@@ -117,7 +117,7 @@ class TestHandlerGame(TestCaseWeb):
         game1_w = data['game']
         # create user2, accept invite and invite again
         self.login(*self.add_user('user2', 'password', None))
-        resp = self.client.get(self.url('invite/{}'.format(data['invite'])))
+        resp = self.client.get(self.url2('invite', data['invite']))
         game1_b = self.load_data(resp)['game']
         resp = self.client.post(self.url('invite'), data={'type': 'no limit'})
         data = self.load_data(resp)
@@ -131,7 +131,7 @@ class TestHandlerGame(TestCaseWeb):
         self.assertEqual(self.load_data(resp), expect)
         # login as user1, accept invite and check games
         self.login('user1', 'password')
-        resp = self.client.get(self.url('invite/{}'.format(data['invite'])))
+        resp = self.client.get(self.url2('invite', data['invite']))
         game2_b = self.load_data(resp)['game']
         resp = self.client.get(self.url('games'))
         expect = {
@@ -144,7 +144,7 @@ class TestHandlerGame(TestCaseWeb):
         # start game and check info for both colors
         user_token1, user_token2 = self.new_game()
         # test first token
-        resp = self.client.get(self.url('{}/info'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'info'))
         data = self.load_data(resp)
         expect = {
             'rc': True, 'started_at': {}, 'ended_at': None, 'board': {},
@@ -153,7 +153,7 @@ class TestHandlerGame(TestCaseWeb):
         }
         self.assertCompareDicts(data, expect)
         # test second token
-        resp = self.client.get(self.url('{}/info'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'info'))
         data = self.load_data(resp)
         expect = {
             'rc': True, 'started_at': {}, 'ended_at': None, 'board': {},
@@ -166,7 +166,7 @@ class TestHandlerGame(TestCaseWeb):
         # request new game and get info
         resp = self.client.post(self.url('new'), data={'type': 'no limit'})
         token = self.load_data(resp)['game']
-        resp = self.client.get(self.url('{}/info'.format(token)))
+        resp = self.client.get(self.url2(token, 'info'))
         expect = {
             'rc': True, 'type': 'no limit', 'limit': None,
         }
@@ -178,14 +178,14 @@ class TestHandlerGame(TestCaseWeb):
         data = self.load_data(resp)
         token = data['game']
         invite_token = data['invite']
-        resp = self.client.get(self.url('{}/info'.format(token)))
+        resp = self.client.get(self.url2(token, 'info'))
         expect = {
             'rc': True, 'type': 'no limit', 'limit': None,
             'invite': invite_token,
         }
         self.assertEqual(self.load_data(resp), expect)
         # shouldn't be info for invited token
-        resp = self.client.get(self.url('{}/info'.format(invite_token)))
+        resp = self.client.get(self.url2(invite_token, 'info'))
         self.assertFalse(self.load_data(resp)['rc'])
 
     def test_game_move_1(self):
@@ -194,13 +194,13 @@ class TestHandlerGame(TestCaseWeb):
         resp = self.client.get(self.url('token/move'))
         self.assertEqual(resp.status_code, 405)
         # validator create error
-        resp = self.client.post(self.url('{}/move'.format(user_token1)), data={})
+        resp = self.client.post(self.url2(user_token1, 'move'), data={})
         data = self.load_data(resp)
         self.assertFalse(data['rc'])
         self.assertIn('error', data)
         # validation field error
         move_data = {'move': 'e0-e1'}
-        resp = self.client.post(self.url('{}/move'.format(user_token2)), data=move_data)
+        resp = self.client.post(self.url2(user_token2, 'move'), data=move_data)
         data = self.load_data(resp)
         self.assertFalse(data['rc'])
         self.assertIn('error', data)
@@ -208,7 +208,7 @@ class TestHandlerGame(TestCaseWeb):
     def test_game_move_2(self):
         user_token1, user_token2 = self.new_game()
         move_data = {'move': 'e2-e4'}
-        resp = self.client.post(self.url('{}/move'.format(user_token1)), data=move_data)
+        resp = self.client.post(self.url2(user_token1, 'move'), data=move_data)
         data = self.load_data(resp)
         expect = {
             'rc': True, 'started_at': {}, 'ended_at': None, 'board': {},
@@ -220,9 +220,9 @@ class TestHandlerGame(TestCaseWeb):
     def test_draw_accept(self):
         user_token1, user_token2 = self.new_game()
         # draw request and accept after, game is over
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'draw/accept'))
         self.assertEqual(self.load_data(resp), {'rc': True})
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'draw/accept'))
         data = self.load_data(resp)
         expect = {
             'rc': True, 'started_at': {}, 'ended_at': {}, 'board': {},
@@ -233,36 +233,36 @@ class TestHandlerGame(TestCaseWeb):
     def test_draw_refuse_1(self):
         user_token1, user_token2 = self.new_game()
         # draw request and refuse after by second player, game is not over
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'draw/accept'))
         self.assertEqual(self.load_data(resp), {'rc': True})
-        resp = self.client.get(self.url('{}/draw/refuse'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'draw/refuse'))
         self.assertEqual(self.load_data(resp), {'rc': True})
         # draw request from second player, game is not over
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'draw/accept'))
         self.assertEqual(self.load_data(resp), {'rc': True})
 
     def test_draw_refuse_2(self):
         user_token1, user_token2 = self.new_game()
         # draw request and refuse after by first player, game is not over
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'draw/accept'))
         self.assertEqual(self.load_data(resp), {'rc': True})
-        resp = self.client.get(self.url('{}/draw/refuse'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'draw/refuse'))
         self.assertEqual(self.load_data(resp), {'rc': True})
         # draw request from second player, game is not over
-        resp = self.client.get(self.url('{}/draw/accept'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'draw/accept'))
         self.assertEqual(self.load_data(resp), {'rc': True})
 
     def test_resign(self):
         user_token1, user_token2 = self.new_game()
         # resign game
-        resp = self.client.get(self.url('{}/resign'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'resign'))
         expect = {
             'rc': True, 'started_at': {}, 'ended_at': {}, 'board': {},
             'color': {}, 'opponent': {}, 'winner': 'black',
         }
         self.assertCompareDicts(self.load_data(resp), expect)
         # try to resign ended game
-        resp = self.client.get(self.url('{}/resign'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'resign'))
         data = self.load_data(resp)
         self.assertFalse(data['rc'])
         self.assertIn('error', data)
@@ -271,16 +271,16 @@ class TestHandlerGame(TestCaseWeb):
         user_token1, user_token2 = self.new_game()
         move1, move2 = 'e2-e4', 'e7-e5'
         # do moves
-        self.client.post(self.url('{}/move'.format(user_token1)), data={'move': move1})
-        self.client.post(self.url('{}/move'.format(user_token2)), data={'move': move2})
+        self.client.post(self.url2(user_token1, 'move'), data={'move': move1})
+        self.client.post(self.url2(user_token2, 'move'), data={'move': move2})
         # check moves
-        resp = self.client.get(self.url('{}/moves'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'moves'))
         self.assertEqual(self.load_data(resp), {'rc': True, 'moves': [move1]})
-        resp = self.client.get(self.url('{}/moves'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'moves'))
         self.assertEqual(self.load_data(resp), {'rc': True, 'moves': [move2]})
         # end game and check moves again
-        self.client.get(self.url('{}/resign'.format(user_token1)))
-        resp = self.client.get(self.url('{}/moves'.format(user_token1)))
+        self.client.get(self.url2(user_token1, 'resign'))
+        resp = self.client.get(self.url2(user_token1, 'moves'))
         self.assertEqual(self.load_data(resp), {'rc': True, 'moves': [move1, move2]})
-        resp = self.client.get(self.url('{}/moves'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'moves'))
         self.assertEqual(self.load_data(resp), {'rc': True, 'moves': [move1, move2]})
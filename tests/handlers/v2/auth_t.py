@@ -1,13 +1,16 @@
-from unittest.mock import patch
-
 from cache import get_cache
 import config
 from models import User
 from tests.base import TestCaseWeb
 
 
+# real method, patched for the test case
+get_verification = User.get_verification
+
+
 class TestHandlerAuth(TestCaseWeb):
     url_prefix = '/v2/auth/'
+    patches = dict(TestCaseWeb.patches, send_mail_template='handlers.v2.auth.send_mail_template')
 
     def test_register_1(self):
         # wrong method
@@ -25,32 +28,29 @@ class TestHandlerAuth(TestCaseWeb):
 
     def test_register_2(self):
         # successful registration without email
-        with patch('connections.send_mail_template') as mock:
-            resp = self.client.post(self.url('register/'), data={
-                'username': 'user1',
-                'password': 'password'
-            })
-            data = self.load_data(resp)
-            self.assertIn('message', data)
-            self.assertFalse(mock.called)
+        resp = self.client.post(self.url('register/'), data={
+            'username': 'user1',
+            'password': 'password'
+        })
+        data = self.load_data(resp)
+        self.assertIn('message', data)
+        self.assertFalse(self.send_mail_template.called)
 
     def test_register_3(self):
         # successful registration with email
-        with patch('handlers.v2.auth.send_mail_template') as mock,\
-                patch('models.User.get_verification') as mock1:
-            mock1.return_value = 'token'
-            resp = self.client.post(self.url('register/'), data={
-                'username': 'user1',
-                'password': 'password',
-                'email': 'user1@fakemail',
-            })
-            data = self.load_data(resp)
-            self.assertIn('message', data)
-            mock.assert_called_once_with('registration', ['user1@fakemail'], data={
-                'username': 'user1',
-                'url': '{}{}'.format(config.SITE_URL, config.VERIFY_URL),
-                'token': 'token'
-            })
+        self.get_verification.return_value = 'token'
+        resp = self.client.post(self.url('register/'), data={
+            'username': 'user1',
+            'password': 'password',
+            'email': 'user1@fakemail',
+        })
+        data = self.load_data(resp)
+        self.assertIn('message', data)
+        self.send_mail_template.assert_called_once_with('registration', ['user1@fakemail'], data={
+            'username': 'user1',
+            'url': '{}{}'.format(config.SITE_URL, config.VERIFY_URL),
+            'token': 'token'
+        })
 
     def test_get_verification_1(self):
         # try to get verification token without login before
@@ -60,15 +60,13 @@ class TestHandlerAuth(TestCaseWeb):
     def test_get_verification_2(self):
         # login and get verification token
         self.login(*self.add_user('user1', 'password', 'user1@fakemail'))
-        with patch('handlers.v2.auth.send_mail_template') as mock,\
-                patch('models.User.get_verification') as mock1:
-            mock1.return_value = 'token'
-            resp = self.client.get(self.url('verification/'))
-            mock.assert_called_once_with('verification', ['user1@fakemail'], data={
-                'username': 'user1',
-                'url': '{}{}'.format(config.SITE_URL, config.VERIFY_URL),
-                'token': 'token',
-            })
+        self.get_verification.return_value = 'token'
+        resp = self.client.get(self.url('verification/'))
+        self.send_mail_template.assert_called_once_with('verification', ['user1@fakemail'], data={
+            'username': 'user1',
+            'url': '{}{}'.format(config.SITE_URL, config.VERIFY_URL),
+            'token': 'token',
+        })
         self.load_data(resp)
 
     def test_verify_1(self):
@@ -79,10 +77,11 @@ class TestHandlerAuth(TestCaseWeb):
     def test_verify_2(self):
         # login, get verification token and verify
         self.login(*self.add_user('user1', 'password', 'user1@fakemail'))
-        with patch('models.generate_token') as mock:
-            mock.return_value = 'token'
-            resp = self.client.get(self.url('verification/'))
-        resp = self.client.get(self.url('verification/token/'))
+        # real token is generated, take it from the sent mail
+        self.get_verification.side_effect = get_verification
+        resp = self.client.get(self.url('verification/'))
+        token = self.send_mail_template.call_args[1]['data']['token']
+        resp = self.client.get(self.url('verification/{}/'.format(token)))
         self.load_data(resp)
 
     def test_reset_1(self):
@@ -112,19 +111,17 @@ class TestHandlerAuth(TestCaseWeb):
 
     def test_reset_and_recover(self):
         self.add_user('user1', 'password', 'user1@fakemail')
-        with patch('handlers.v2.auth.send_mail_template') as mock,\
-                patch('models.generate_token') as mock1:
-            mock1.return_value = 'token'
-            resp = self.client.post(self.url('reset/'), data={'email': 'user1@fakemail'})
-            mock.assert_called_once_with('reset', ['user1@fakemail'], data={
-                'username': 'user1',
-                'url': '{}{}'.format(config.SITE_URL, config.RECOVER_URL),
-                'token': 'token',
-            })
-            self.load_data(resp)
-        resp = self.client.get(self.url('recover/token/'))
+        resp = self.client.post(self.url('reset/'), data={'email': 'user1@fakemail'})
         self.load_data(resp)
-        resp = self.client.post(self.url('recover/token/'), data={'password': 'password'})
+        token = self.send_mail_template.call_args[1]['data']['token']
+        self.send_mail_template.assert_called_once_with('reset', ['user1@fakemail'], data={
+            'username': 'user1',
+            'url': '{}{}'.format(config.SITE_URL, config.RECOVER_URL),
+            'token': token,
+        })
+        resp = self.client.get(self.url('recover/{}/'.format(token)))
+        self.load_data(resp)
+        resp = self.client.post(self.url('recover/{}/'.format(token)), data={'password': 'password'})
         self.load_data(resp)
         self.assertTrue(User.authenticate('user1', 'password'))
 
@@ -20,7 +20,7 @@ class TestHandlerGame(TestCaseWeb):
         resp = self.client.get(self.url('new/'))
         data = self.load_data(resp)
         game_id = data['games'][0]['id']
-        resp = self.client.post(self.url('new/{}/'.format(game_id)))
+        resp = self.client.post(self.url2('new', game_id, ''))
         token2 = self.load_data(resp)['game']
         return token1, token2
 
@@ -93,7 +93,7 @@ class TestHandlerGame(TestCaseWeb):
         self.assertCompareDicts(data, expect)
         token = data['invite']
         # start game with invitation token
-        resp = self.client.get(self.url('invite/{}/'.format(token)))
+        resp = self.client.get(self.url2('invite', token, ''))
         data = self.load_data(resp)
         expect = {
             'board': {}, 'time_left': {}, 'enemy_time_left': {},
@@ -114,7 +114,7 @@ class TestHandlerGame(TestCaseWeb):
         game1_w = data['game']
         # create user2, accept invite and invite again
         self.login(*self.add_user('user2', 'password', None))
-        resp = self.client.get(self.url('invite/{}/'.format(data['invite'])))
+        resp = self.client.get(self.url2('invite', data['invite'], ''))
         game1_b = self.load_data(resp)['game']
         resp = self.client.post(self.url('invite/'), data={'type': 'no limit'})
         data = self.load_data(resp)
@@ -127,7 +127,7 @@ class TestHandlerGame(TestCaseWeb):
         self.assertEqual(self.load_data(resp), expect)
         # login as user1, accept invite and check games
         self.login('user1', 'password')
-        resp = self.client.get(self.url('invite/{}/'.format(data['invite'])))
+        resp = self.client.get(self.url2('invite', data['invite'], ''))
         game2_b = self.load_data(resp)['game']
         resp = self.client.get(self.url('games/'))
         expect = {
@@ -139,7 +139,7 @@ class TestHandlerGame(TestCaseWeb):
         # start game and check info for both colors
         user_token1, user_token2 = self.new_game()
         # test first token
-        resp = self.client.get(self.url('{}/info/'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'info/'))
         data = self.load_data(resp)
         expect = {
             'started_at': {}, 'ended_at': None, 'board': {},
@@ -148,7 +148,7 @@ class TestHandlerGame(TestCaseWeb):
         }
         self.assertCompareDicts(data, expect)
         # test second token
-        resp = self.client.get(self.url('{}/info/'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'info/'))
         data = self.load_data(resp)
         expect = {
             'started_at': {}, 'ended_at': None, 'board': {},
@@ -161,7 +161,7 @@ class TestHandlerGame(TestCaseWeb):
         # request new game and get info
         resp = self.client.post(self.url('new/'), data={'type': 'no limit'})
         token = self.load_data(resp)['game']
-        resp = self.client.get(self.url('{}/info/'.format(token)))
+        resp = self.client.get(self.url2(token, 'info/'))
         expect = {
             'type': 'no limit', 'limit': None,
         }
@@ -173,30 +173,30 @@ class TestHandlerGame(TestCaseWeb):
         data = self.load_data(resp)
         token = data['game']
         invite_token = data['invite']
-        resp = self.client.get(self.url('{}/info/'.format(token)))
+        resp = self.client.get(self.url2(token, 'info/'))
         expect = {
             'type': 'no limit', 'limit': None,
             'invite': invite_token,
         }
         self.assertEqual(self.load_data(resp), expect)
         # shouldn't be info for invited token
-        resp = self.client.get(self.url('{}/info/'.format(invite_token)))
+        resp = self.client.get(self.url2(invite_token, 'info/'))
         self.assertApiError(resp)
 
     def test_game_move_1(self):
         user_token1, user_token2 = self.new_game()
         # validator create error
-        resp = self.client.post(self.url('{}/moves/'.format(user_token1)), data={})
+        resp = self.client.post(self.url2(user_token1, 'moves/'), data={})
         self.assertApiError(resp)
         # validation field error
         move_data = {'move': 'e0-e1'}
-        resp = self.client.post(self.url('{}/moves/'.format(user_token2)), data=move_data)
+        resp = self.client.post(self.url2(user_token2, 'moves/'), data=move_data)
         self.assertApiError(resp)
 
     def test_game_move_2(self):
         user_token1, user_token2 = self.new_game()
         move_data = {'move': 'e2-e4'}
-        resp = self.client.post(self.url('{}/moves/'.format(user_token1)), data=move_data)
+        resp = self.client.post(self.url2(user_token1, 'moves/'), data=move_data)
         data = self.load_data(resp)
         expect = {
             'started_at': {}, 'ended_at': None, 'board': {},
@@ -208,9 +208,9 @@ class TestHandlerGame(TestCaseWeb):
     def test_draw_accept(self):
         user_token1, user_token2 = self.new_game()
         # draw request and accept after, game is over
-        resp = self.client.post(self.url('{}/draw/'.format(user_token1)))
+        resp = self.client.post(self.url2(user_token1, 'draw/'))
         self.load_data(resp)
-        resp = self.client.post(self.url('{}/draw/'.format(user_token2)))
+        resp = self.client.post(self.url2(user_token2, 'draw/'))
         data = self.load_data(resp)
         expect = {
             'started_at': {}, 'ended_at': {}, 'board': {},
@@ -221,53 +221,53 @@ class TestHandlerGame(TestCaseWeb):
     def test_draw_refuse_1(self):
         user_token1, user_token2 = self.new_game()
         # draw request and refuse after by second player, game is not over
-        resp = self.client.post(self.url('{}/draw/'.format(user_token1)))
+        resp = self.client.post(self.url2(user_token1, 'draw/'))
         self.load_data(resp)
-        resp = self.client.delete(self.url('{}/draw/'.format(user_token2)))
+        resp = self.client.delete(self.url2(user_token2, 'draw/'))
         self.load_data(resp)
         # draw request from second player, game is not over
-        resp = self.client.post(self.url('{}/draw/'.format(user_token2)))
+        resp = self.client.post(self.url2(user_token2, 'draw/'))
         self.load_data(resp)
 
     def test_draw_refuse_2(self):
         user_token1, user_token2 = self.new_game()
         # draw request and refuse after by first player, game is not over
-        resp = self.client.post(self.url('{}/draw/'.format(user_token1)))
+        resp = self.client.post(self.url2(user_token1, 'draw/'))
         self.load_data(resp)
-        resp = self.client.delete(self.url('{}/draw/'.format(user_token1)))
+        resp = self.client.delete(self.url2(user_token1, 'draw/'))
         self.load_data(resp)
         # draw request from second player, game is not over
-        resp = self.client.post(self.url('{}/draw/'.format(user_token2)))
+        resp = self.client.post(self.url2(user_token2, 'draw/'))
         self.load_data(resp)
 
     def test_resign(self):
         user_token1, user_token2 = self.new_game()
         # resign game
-        resp = self.client.post(self.url('{}/resign/'.format(user_token1)))
+        resp = self.client.post(self.url2(user_token1, 'resign/'))
         expect = {
             'started_at': {}, 'ended_at': {}, 'board': {},
             'color': {}, 'opponent': {}, 'winner': 'black',
         }
         self.assertCompareDicts(self.load_data(resp), expect)
         # try to resign ended game
-        resp = self.client.post(self.url('{}/resign/'.format(user_token2)))
+        resp = self.client.post(self.url2(user_token2, 'resign/'))
         self.assertApiError(resp)
 
     def test_moves(self):
         user_token1, user_token2 = self.new_game()
         move1, move2 = 'e2-e4', 'e7-e5'
         # do moves
-        self.client.post(self.url('{}/moves/'.format(user_token1)), data={'move': move1})
-        self.client.post(self.url('{}/moves/'.format(user_token2)), data={'move': move2})
+        self.client.post(self.url2(user_token1, 'moves/'), data={'move': move1})
+        self.client.post(self.url2(user_token2, 'moves/'), data={'move': move2})
         # check moves
-        resp = self.client.get(self.url('{}/moves/'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'moves/'))
         self.assertEqual(self.load_data(resp), {'moves': [move1]})
-        resp = self.client.get(self.url('{}/moves/'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'moves/'))
         self.assertEqual(self.load_data(resp), {'moves': [move2]})
         # end game and check moves again
-        self.client.post(self.url('{}/resign/'.format(user_token1)))
+        self.client.post(self.url2(user_token1, 'resign/'))
         self.load_data(resp)
-        resp = self.client.get(self.url('{}/moves/'.format(user_token1)))
+        resp = self.client.get(self.url2(user_token1, 'moves/'))
         self.assertEqual(self.load_data(resp), {'moves': [move1, move2]})
-        resp = self.client.get(self.url('{}/moves/'.format(user_token2)))
+        resp = self.client.get(self.url2(user_token2, 'moves/'))
         self.assertEqual(self.load_data(resp), {'moves': [move1, move2]})
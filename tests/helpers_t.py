@@ -1,8 +1,8 @@
 import config
 from tests.base import TestCaseBase
 from helpers import (
-    onBoard, pos2coors, coors2pos, invert_color, encrypt_password, generate_token,
-    with_context, get_queue_name, get_prefix, get_request_arg
+    onBoard, pos2coors, coors2pos, invert_color, encrypt_password, encrypt_password_legacy,
+    is_legacy_password, check_password, generate_token, with_context, get_queue_name, get_prefix, get_request_arg
 )
 from consts import WHITE, BLACK
 
@@ -44,8 +44,20 @@ class TestHelpers(TestCaseBase):
         self.assertEqual(invert_color(BLACK), WHITE)
 
     def test_encrypt_password(self):
+        hashed = encrypt_password('password')
+        self.assertEqual(len(hashed), 60)
+        self.assertFalse(is_legacy_password(hashed))
+        self.assertNotEqual(encrypt_password('password'), hashed)
+        self.assertTrue(check_password('password', hashed))
+        self.assertFalse(check_password('passwd', hashed))
+
+    def test_encrypt_password_legacy(self):
         config.PASSWORD_SALT = 'salt'
-        self.assertEqual(encrypt_password('password'), 'd514dee5e76bbb718084294c835f312c')
+        hashed = encrypt_password_legacy('password')
+        self.assertEqual(hashed, 'd514dee5e76bbb718084294c835f312c')
+        self.assertTrue(is_legacy_password(hashed))
+        self.assertTrue(check_password('password', hashed))
+        self.assertFalse(check_password('passwd', hashed))
 
     def test_generate_token(self):
         self.assertEqual(len(generate_token()), 32)
@@ -1,12 +1,51 @@
-import time
+from unittest.mock import patch
 from datetime import datetime, timedelta
 
+import peewee
+from peewee import IntegrityError
+
 import config
 import errors
 from tests.base import TestCaseDB
 from consts import WHITE, BLACK, TYPE_SLOW, TYPE_FAST, END_CHECKMATE, END_DRAW
-from models import User, Game, Move
-from cache import get_cache, set_cache
+from models import User, Game, Move, migrate_timestamps, create_move_index
+from cache import get_cache, set_cache, delete_cache
+from helpers import encrypt_password_legacy, is_legacy_password
+
+
+class TestModelsTimestampField(TestCaseDB):
+
+    def test_timestamp_field(self):
+        field = Game.date_end
+        dt = datetime(2015, 1, 27, 12, 0, 0, 123456)
+        value = field.db_value(dt)
+        self.assertIsInstance(value, int)
+        self.assertEqual(value % 1000000, 123456)
+        self.assertEqual(field.python_value(value), dt)
+        self.assertIsNone(field.db_value(None))
+        self.assertIsNone(field.python_value(None))
+        # stored as integer
+        game = Game.create(white='123', black='456', date_end=dt)
+        self.assertEqual(Game.get(pk=game.pk).date_end, dt)
+        raw = Game._meta.database.execute_sql('SELECT date_end FROM game').fetchone()[0]
+        self.assertEqual(raw, value)
+
+    def test_migrate_timestamps(self):
+        dt = datetime(2015, 1, 27, 12, 0, 0, 123456)
+        game = Game.create(white='123', black='456')
+        # row written before dates were stored as timestamps
+        Game.execute_sql('UPDATE game SET date_end = ? WHERE pk = ?', ('2015-01-27 12:00:00.123456', game.pk))
+        self.assertEqual(migrate_timestamps([Game]), 1)
+        raw = Game.execute_sql('SELECT date_end FROM game').fetchone()[0]
+        self.assertEqual(raw, Game.date_end.db_value(dt))
+        self.assertEqual(Game.get(pk=game.pk).date_end, dt)
+        # nothing to convert
+        self.assertEqual(migrate_timestamps([Game]), 0)
+        # only sqlite is migrated
+        Game.execute_sql('UPDATE game SET date_end = ? WHERE pk = ?', ('2015-01-27 12:00:00.123456', game.pk))
+        with patch.object(Game._meta, 'database', peewee.PostgresqlDatabase('dark_chess')):
+            self.assertEqual(migrate_timestamps([Game]), 0)
+        self.assertEqual(migrate_timestamps([Game]), 1)
 
 
 class TestModelsUser(TestCaseDB):
@@ -27,6 +66,34 @@ class TestModelsUser(TestCaseDB):
         token = User.authenticate('user1', 'passwd')
         self.assertEqual(User.get_by_token(token).password, str(user.password))
 
+    def test_authenticate_cache(self):
+        user = User.add('user1', 'passwd')
+        with patch('models.check_password') as mock:
+            mock.return_value = True
+            self.assertTrue(User.authenticate('user1', 'passwd'))
+            self.assertTrue(User.authenticate('user1', 'passwd'))
+            mock.assert_called_once_with('passwd', user.password)
+            # cache name depends on server secret
+            with patch('config.AUTH_CACHE_SECRET', b'other secret'):
+                self.assertTrue(User.authenticate('user1', 'passwd'))
+            self.assertEqual(mock.call_count, 2)
+            # other password is not cached
+            mock.return_value = False
+            self.assertFalse(User.authenticate('user1', 'passw'))
+        # password is changed, cache is not used anymore
+        user.set_password('newpasswd')
+        self.assertFalse(User.authenticate('user1', 'passwd'))
+        self.assertTrue(User.authenticate('user1', 'newpasswd'))
+
+    def test_authenticate_legacy(self):
+        # user with old md5 password is upgraded on login
+        user = User.create(username='user1', password=encrypt_password_legacy('passwd'))
+        self.assertFalse(User.authenticate('user1', 'passw'))
+        self.assertTrue(is_legacy_password(User.get(pk=user.pk).password))
+        self.assertTrue(User.authenticate('user1', 'passwd'))
+        self.assertFalse(is_legacy_password(User.get(pk=user.pk).password))
+        self.assertTrue(User.authenticate('user1', 'passwd'))
+
     def test_get_by_token(self):
         # token not exist
         self.assertIsNone(User.get_by_token('asdfgh'))
@@ -38,6 +105,32 @@ class TestModelsUser(TestCaseDB):
         set_cache('asdfgh', user.pk)
         self.assertEqual(User.get_by_token('asdfgh'), user)
 
+    def test_get_cached(self):
+        # user not exist
+        self.assertIsNone(User.get_cached(1))
+        self.assertIsNone(get_cache('user-1'))
+        # load user and cache it
+        user = User.add('user1', 'passwd', 'user1@fakemail.net')
+        self.assertEqual(User.get_cached(user.pk), user)
+        self.assertEqual(get_cache('user-{}'.format(user.pk))['username'], 'user1')
+        self.assertNotIn('password', get_cache('user-{}'.format(user.pk)))
+        # load user from cache
+        with patch('models.User.get') as mock:
+            cached = User.get_cached(user.pk)
+            self.assertFalse(mock.called)
+        self.assertEqual(cached, user)
+        self.assertEqual(cached.email, 'user1@fakemail.net')
+        self.assertFalse(cached.verified)
+        # saving invalidates cache
+        cached.verify()
+        self.assertIsNone(get_cache('user-{}'.format(user.pk)))
+        self.assertTrue(User.get_cached(user.pk).verified)
+        self.assertTrue(User.authenticate('user1', 'passwd'))
+        user.set_password('newpasswd')
+        self.assertIsNone(get_cache('user-{}'.format(user.pk)))
+        self.assertEqual(User.get_cached(user.pk).password, user.password)
+        self.assertIsNone(User.get_cached(user.pk).password)
+
     def test_verification(self):
         # add user and check it
         user = User.add('user1', 'passwd')
@@ -87,8 +180,8 @@ class TestModelsGame(TestCaseDB):
         self.assertEqual(Game.select().count(), 1)
         self.assertEqual(Move.select().count(), 0)
         self.assertFalse(game.ended)
-        # wait a second
-        time.sleep(1)
+        # game was created two seconds ago
+        game.date_created = game.date_state = datetime.now() - timedelta(seconds=2)
         # add move and check
         game.add_move('K', 'e1-e2', 'Ke2,ke8')
         self.assertEqual(Move.select().count(), 1)
@@ -97,12 +190,17 @@ class TestModelsGame(TestCaseDB):
         self.assertEqual(game.next_color, BLACK)
         self.assertEqual(game.state, 'Ke2,ke8')
         self.assertTrue((game.date_state - game.date_created).total_seconds() > 1)
-        self.assertAlmostEqual(game.moves.get().time_move, 1, places=1)
+        self.assertAlmostEqual(game.moves.get().time_move, 2, places=1)
         self.assertFalse(game.ended)
-        # add move with ending game
-        game.add_move('k', 'e8-e7', 'Ke2,ke7', True)
+        self.assertEqual(game.cut, '')
+        # add move with ending game and cut figure
+        game.add_move('k', 'e8-e7', 'Ke2,ke7', True, 'P')
         self.assertTrue(game.ended)
         self.assertEqual(game.winner, BLACK)
+        # reload game
+        game = Game.get(pk=game.pk)
+        self.assertTrue(game.ended)
+        self.assertEqual(game.cut, 'P')
 
     def test_game_over_1(self):
         # add game and check it
@@ -147,10 +245,12 @@ class TestModelsGame(TestCaseDB):
             white='123', black='456', state='Ke1,ke8',
             type_game=TYPE_FAST, time_limit=20
         )
-        Move.create(game=game, number=1, figure='K', move='e1-e2', time_move=9, color=WHITE)
-        Move.create(game=game, number=2, figure='k', move='e8-e7', time_move=3, color=BLACK)
-        Move.create(game=game, number=3, figure='K', move='e2-e3', time_move=5, color=WHITE)
-        Move.create(game=game, number=4, figure='k', move='e7-e8', time_move=6, color=BLACK)
+        Move.bulk_add([
+            (game, 1, 'K', 'e1-e2', 9, WHITE),
+            (game, 2, 'k', 'e8-e7', 3, BLACK),
+            (game, 3, 'K', 'e2-e3', 5, WHITE),
+            (game, 4, 'k', 'e7-e8', 6, BLACK),
+        ])
         self.assertFalse(game.ended)
         self.assertAlmostEqual(game.time_left(WHITE), 6, places=1)
         self.assertAlmostEqual(game.time_left(BLACK), 11, places=1)
@@ -173,10 +273,12 @@ class TestModelsGame(TestCaseDB):
             white='123', black='456', state='Ke1,ke8',
             type_game=TYPE_SLOW, time_limit=10
         )
-        Move.create(game=game, number=1, figure='K', move='e1-e2', time_move=9, color=WHITE)
-        Move.create(game=game, number=2, figure='k', move='e8-e7', time_move=3, color=BLACK)
-        Move.create(game=game, number=3, figure='K', move='e2-e3', time_move=5, color=WHITE)
-        Move.create(game=game, number=4, figure='k', move='e7-e8', time_move=6, color=BLACK)
+        Move.bulk_add([
+            (game, 1, 'K', 'e1-e2', 9, WHITE),
+            (game, 2, 'k', 'e8-e7', 3, BLACK),
+            (game, 3, 'K', 'e2-e3', 5, WHITE),
+            (game, 4, 'k', 'e7-e8', 6, BLACK),
+        ])
         self.assertFalse(game.ended)
         self.assertAlmostEqual(game.time_left(WHITE), 10, places=1)
         self.assertAlmostEqual(game.time_left(BLACK), 10, places=1)
@@ -199,10 +301,12 @@ class TestModelsGame(TestCaseDB):
             white='123', black='456', state='Ke1,ke8',
             time_limit=10
         )
-        Move.create(game=game, number=1, figure='K', move='e1-e2', time_move=9, color=WHITE)
-        Move.create(game=game, number=2, figure='k', move='e8-e7', time_move=3, color=BLACK)
-        Move.create(game=game, number=3, figure='K', move='e2-e3', time_move=5, color=WHITE)
-        Move.create(game=game, number=4, figure='k', move='e7-e8', time_move=6, color=BLACK)
+        Move.bulk_add([
+            (game, 1, 'K', 'e1-e2', 9, WHITE),
+            (game, 2, 'k', 'e8-e7', 3, BLACK),
+            (game, 3, 'K', 'e2-e3', 5, WHITE),
+            (game, 4, 'k', 'e7-e8', 6, BLACK),
+        ])
         self.assertFalse(game.ended)
         self.assertIsNone(game.time_left(WHITE))
         self.assertIsNone(game.time_left(BLACK))
@@ -221,6 +325,65 @@ class TestModelsGame(TestCaseDB):
         self.assertEqual([1], [g.pk for g in game.get_moves(WHITE)])
         self.assertEqual([2], [g.pk for g in game.get_moves(BLACK)])
         self.assertEqual([1, 2], [g.pk for g in game.get_moves()])
+        self.assertEqual([1, 2], [g.number for g in game.get_moves()])
+
+    def test_move_add(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        move = Move.add(game, 1, 'K', 'e1-e2', 2.5, WHITE)
+        self.assertEqual(move.number, 1)
+        saved = Move.get(pk=move.pk)
+        self.assertEqual(saved.game, game)
+        self.assertEqual((saved.figure, saved.move, saved.color), ('K', 'e1-e2', WHITE))
+        self.assertEqual(saved.time_move, 2.5)
+        self.assertEqual(saved.date_created, move.date_created)
+        # compiled query is reused
+        with patch('models.Move.insert') as mock:
+            self.assertEqual(Move.add(game, 2, 'K', 'e2-e3', 1, WHITE).number, 2)
+            self.assertFalse(mock.called)
+        self.assertEqual(Move.select().count(), 2)
+
+    def test_move_number_unique(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        Move.bulk_add([(game, 1, 'K', 'e1-e2', 1, WHITE)])
+        with self.assertRaises(IntegrityError):
+            Move.bulk_add([(game, 1, 'k', 'e8-e7', 1, BLACK)])
+        self.assertEqual(Move.select().count(), 1)
+
+    def test_create_move_index(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        # index exists already
+        self.assertEqual(create_move_index(), [])
+        # database created before the index, with duplicate moves
+        Move.execute_sql('DROP INDEX move_game_id_number')
+        Move.bulk_add([(game, 1, 'K', 'e1-e2', 1, WHITE), (game, 1, 'K', 'e1-e2', 1, WHITE)])
+        self.assertEqual(create_move_index(), [game.pk])
+        Move.delete().where(Move.pk == Move.select(peewee.fn.MAX(Move.pk))).execute()
+        self.assertEqual(create_move_index(), [])
+        with self.assertRaises(IntegrityError):
+            Move.bulk_add([(game, 1, 'K', 'e1-e2', 1, WHITE)])
+
+    def test_get_next_move_num(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        self.assertEqual(game.add_move('K', 'e1-e2', 'Ke2,ke8').number, 1)
+        self.assertEqual(game.add_move('k', 'e8-e7', 'Ke2,ke7').number, 2)
+        # counter is lost, number is restored from moves
+        delete_cache('game-{}-moves'.format(game.pk))
+        self.assertEqual(game.get_next_move_num(), 3)
+        self.assertEqual(game.get_next_move_num(), 4)
+
+    def test_bulk_add_counter(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        Move.bulk_add([(game, 1, 'K', 'e1-e2', 1, WHITE), (game.pk, 2, 'k', 'e8-e7', 1, BLACK)])
+        self.assertEqual(game.add_move('K', 'e2-e3', 'Ke3,ke7').number, 3)
+
+    def test_add_move_rollback(self):
+        game = Game.create(white='123', black='456', state='Ke1,ke8')
+        self.assertEqual(game.add_move('K', 'e1-e2', 'Ke2,ke8').number, 1)
+        with patch('models.Move.add', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                game.add_move('k', 'e8-e7', 'Ke2,ke7')
+        # no gap in numbers after rolled back move
+        self.assertEqual(game.add_move('k', 'e8-e7', 'Ke2,ke7').number, 2)
 
     def test_get_winner_1(self):
         # add game and finish without winner